@@ -1,41 +1,66 @@
 """Universal MCP Client - Main entry point."""
+import argparse
 import asyncio
 import sys
 from pathlib import Path
+from typing import Optional
 
 from src.core.universal_client import UniversalMCPClient
 from src.utils.log_config import get_logger
 
 logger = get_logger(__name__)
 
+try:
+    # libuv-backed loop: less per-I/O overhead for MCP stdio and HTTP traffic
+    import uvloop
+    _loop_factory = uvloop.new_event_loop
+except ImportError:
+    _loop_factory = None
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Universal MCP Client - supports multiple servers and domains.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""Examples:
+  python main.py ./weather_server.py
+  python main.py ./weather_server.py ./finance_server.py
+  python main.py --discover ./mcp_servers/"""
+    )
+    parser.add_argument("servers", nargs="*", help="MCP server scripts to connect to (.py or .js)")
+    parser.add_argument("--discover", metavar="DIR", nargs="?", const="./servers",
+                        help="auto-discover MCP servers in DIR (default: ./servers)")
+    
+    args = parser.parse_args()
+    if not args.servers and args.discover is None:
+        parser.print_help()
+        sys.exit(1)
+    return args
+
 async def main():
     """Universal MCP Client - supports multiple servers and domains."""
-    if len(sys.argv) < 2:
-        print("Universal MCP Client Usage:")
-        print("  Single server: python main.py <server_path> [server_id]")
-        print("  Multiple servers: python main.py server1.py server2.py server3.py")
-        print("  Auto-discovery: python main.py --discover <directory>")
-        print()
-        print("Examples:")
-        print("  python main.py ./weather_server.py")
-        print("  python main.py ./weather_server.py ./finance_server.py")
-        print("  python main.py --discover ./mcp_servers/")
-        sys.exit(1)
-    
+    args = parse_args()
     client = UniversalMCPClient()
     
     try:
         # Handle different invocation modes
-        if sys.argv[1] == "--discover":
-            directory = sys.argv[2] if len(sys.argv) > 2 else "./servers"
-            print(f"🔍 Auto-discovering MCP servers in: {directory}")
-            await client.auto_discover_servers(Path(directory))
+        if args.discover is not None:
+            print(f"🔍 Auto-discovering MCP servers in: {args.discover}")
+            await client.auto_discover_servers(Path(args.discover))
         else:
-            # Connect to specified servers
-            for i, server_path in enumerate(sys.argv[1:], 1):
-                server_id = f"server_{i}" if len(sys.argv) > 2 else Path(server_path).stem
+            # Connect to specified servers concurrently
+            if len(args.servers) > 1:
+                jobs = [(f"server_{i}", path) for i, path in enumerate(args.servers, 1)]
+            else:
+                jobs = [(Path(args.servers[0]).stem, args.servers[0])]
+            
+            # Initialize once up front so concurrent connects don't race on it
+            await client.initialize()
+            for server_id, server_path in jobs:
                 print(f"🔌 Connecting to server '{server_id}' at '{server_path}'...")
-                await client.connect_to_server(server_id, server_path)
+            await asyncio.gather(*(
+                client.connect_to_server(server_id, server_path) for server_id, server_path in jobs
+            ))
         
         await interactive_session(client)
         
@@ -65,7 +90,8 @@ async def interactive_session(client: UniversalMCPClient):
     
     while True:
         try:
-            query = input("Query: ").strip()
+            # Read in a worker thread so the event loop keeps servicing MCP I/O
+            query = (await asyncio.to_thread(input, "Query: ")).strip()
             
             if query.lower() in ['quit', 'exit', 'q']:
                 break
@@ -73,12 +99,30 @@ async def interactive_session(client: UniversalMCPClient):
             if not query:
                 continue
             
-            print("🤔 Analyzing query and planning workflow...", end="", flush=True)
+            sys.stdout.write("🤔 Analyzing query and planning workflow...")
+            sys.stdout.flush()
             response = await client.process_universal_query(query)
-            print(f"\r🤖 {response}\n")
+            # \033[K clears the rest of the indicator line before the response
+            sys.stdout.write(f"\r\033[K🤖 {response}\n\n")
+            sys.stdout.flush()
             
         except Exception as e:
             print(f"\n❌ Error: {e}\n")
 
+def run() -> Optional[asyncio.Task]:
+    """Run the client, scheduling onto the host loop if one is already running."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    
+    if loop is not None:
+        # Called from an async host (e.g. a notebook) - don't start a nested loop
+        return loop.create_task(main())
+    
+    with asyncio.Runner(loop_factory=_loop_factory) as runner:
+        runner.run(main())
+    return None
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run()
\ No newline at end of file
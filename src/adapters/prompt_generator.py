@@ -1,6 +1,9 @@
 """Dynamic system prompt generation through server intelligence."""
+import functools
 import re
-from typing import Dict, List, Set, Tuple, Optional
+import sys
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Set, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 
@@ -9,22 +12,38 @@ from src.utils.log_config import get_logger
 
 logger = get_logger(__name__)
 
-@dataclass
+# Naming keywords that drive workflow inference, matched once per tool name
+WORKFLOW_KEYWORDS = frozenset({
+    "api", "http", "url", "secret", "format", "extract", "ai", "cache",
+    "request", "get", "parse", "process", "start",
+})
+
+# Workflow classification keywords and the query triggers for each workflow type
+API_KWS = frozenset({"secret", "url", "http", "request"})
+DATA_KWS = frozenset({"process", "format", "extract"})
+AI_KWS = frozenset({"ai"})
+
+API_TRIGGERS = ("data", "information", "get", "fetch", "what", "show")
+DATA_TRIGGERS = ("process", "analyze", "format", "parse")
+AI_TRIGGERS = ("recommend", "suggest", "what should", "advice")
+GENERAL_TRIGGERS = ("help", "do", "can you")
+
+@dataclass(slots=True)
 class WorkflowStep:
     """Represents a step in an inferred workflow."""
     tool_name: str
     purpose: str
-    dependencies: List[str]
+    dependencies: Tuple[str, ...]
     outputs: List[str]
     position: int  # Order in workflow
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowPattern:
     """Complete workflow pattern discovered through analysis."""
     name: str
     steps: List[WorkflowStep]
     description: str
-    triggers: List[str]  # Query patterns that should trigger this workflow
+    triggers: Tuple[str, ...]  # Query patterns that should trigger this workflow
 
 class WorkflowInference:
     """Infers workflows by analyzing tool relationships."""
@@ -38,144 +57,163 @@ class WorkflowInference:
             "ai_enhanced": ["process", "ai_completion", "format"]
         }
     
-    async def infer_workflows(self, tools) -> List[WorkflowPattern]:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _match_keywords(tool_name: str) -> FrozenSet[str]:
+        """Return the workflow keywords contained in a tool name (cached per name)."""
+        name_lower = tool_name.lower()
+        return frozenset(kw for kw in WORKFLOW_KEYWORDS if kw in name_lower)
+    
+    def infer_workflows(self, tools) -> List[WorkflowPattern]:
         """Infer likely workflows from tool analysis."""
         logger.info("🧠 Inferring workflows from tool analysis...")
         
+        # Match naming keywords once per tool; every later pass reads the cache
+        for tool in tools:
+            self._match_keywords(tool.name)
+        
         # Analyze tool dependencies
-        dependencies = await self._analyze_tool_dependencies(tools)
+        dependencies = self._analyze_tool_dependencies(tools)
         
         # Build workflow graphs
-        workflows = await self._build_workflow_graphs(tools, dependencies)
+        workflows = self._build_workflow_graphs(tools, dependencies)
         
         # Generate workflow patterns
-        patterns = await self._generate_workflow_patterns(workflows)
+        patterns = self._generate_workflow_patterns(workflows)
         
         logger.info(f"🧠 Discovered {len(patterns)} workflow patterns")
         return patterns
     
-    async def _analyze_tool_dependencies(self, tools) -> Dict[str, List[str]]:
+    def _analyze_tool_dependencies(self, tools) -> Dict[str, List[str]]:
         """Analyze what tools depend on outputs from other tools."""
-        dependencies = {}
+        # Index provider tools by the keyword bucket they satisfy in one pass
+        buckets: Dict[str, List[str]] = {
+            "url_or_secret": [],
+            "http_or_request_or_get": [],
+            "format_or_extract": [],
+        }
+        for tool in tools:
+            keywords = self._match_keywords(tool.name)
+            if keywords & {"url", "secret"}:
+                buckets["url_or_secret"].append(tool.name)
+            if keywords & {"http", "request", "get"}:
+                buckets["http_or_request_or_get"].append(tool.name)
+            if keywords & {"format", "extract"}:
+                buckets["format_or_extract"].append(tool.name)
         
+        dependencies = {}
         for tool in tools:
-            tool_deps = []
-            tool_name = tool.name.lower()
-            description = (tool.description or "").lower()
+            keywords = self._match_keywords(tool.name)
             
             # Analyze naming patterns for dependencies
-            if "api" in tool_name or "http" in tool_name:
+            if keywords & {"api", "http"}:
                 # HTTP tools typically need URLs and possibly auth
-                for other_tool in tools:
-                    other_name = other_tool.name.lower()
-                    if "url" in other_name or "secret" in other_name:
-                        tool_deps.append(other_tool.name)
-            
-            elif "format" in tool_name or "extract" in tool_name:
+                dependencies[tool.name] = buckets["url_or_secret"]
+            elif keywords & {"format", "extract"}:
                 # Format/extract tools need data from HTTP or processing tools
-                for other_tool in tools:
-                    other_name = other_tool.name.lower()
-                    if "http" in other_name or "request" in other_name or "get" in other_name:
-                        tool_deps.append(other_tool.name)
-            
-            elif "ai" in tool_name:
+                dependencies[tool.name] = buckets["http_or_request_or_get"]
+            elif "ai" in keywords:
                 # AI tools typically come after data processing
-                for other_tool in tools:
-                    other_name = other_tool.name.lower()
-                    if "format" in other_name or "extract" in other_name:
-                        tool_deps.append(other_tool.name)
-            
-            dependencies[tool.name] = tool_deps
+                dependencies[tool.name] = buckets["format_or_extract"]
+            else:
+                dependencies[tool.name] = []
         
         return dependencies
     
-    async def _build_workflow_graphs(self, tools, dependencies) -> List[List[str]]:
+    def _build_workflow_graphs(self, tools, dependencies) -> List[List[str]]:
         """Build likely workflow sequences."""
         workflows = []
         
+        # Index which tools depend on each tool once, instead of rescanning
+        # every dependency list at each step of every traced path
+        dependents: Dict[str, List[str]] = defaultdict(list)
+        for tool_name, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].append(tool_name)
+        
         # Find "starting" tools (tools with few/no dependencies)
         starting_tools = [
             tool.name for tool in tools 
             if len(dependencies.get(tool.name, [])) == 0 
-            and any(pattern in tool.name.lower() for pattern in ["get", "secret", "start"])
+            and self._match_keywords(tool.name) & {"get", "secret", "start"}
         ]
         
         # Build workflows starting from each starting tool
         for start_tool in starting_tools:
-            workflow = await self._trace_workflow_path(start_tool, tools, dependencies)
+            workflow = self._trace_workflow_path(start_tool, dependents)
             if len(workflow) > 1:  # Only include multi-step workflows
                 workflows.append(workflow)
         
         return workflows
     
-    async def _trace_workflow_path(self, start_tool: str, tools, dependencies) -> List[str]:
+    def _trace_workflow_path(self, start_tool: str, dependents: Dict[str, List[str]]) -> List[str]:
         """Trace a workflow path from a starting tool."""
         path = [start_tool]
+        visited = {start_tool}
         current_tool = start_tool
         
         # Find tools that depend on the current tool
         while True:
             next_tools = [
-                tool_name for tool_name, deps in dependencies.items()
-                if current_tool in deps and tool_name not in path
+                tool_name for tool_name in dependents.get(current_tool, ())
+                if tool_name not in visited
             ]
             
             if not next_tools:
                 break
             
             # Choose the most likely next tool based on naming patterns
-            next_tool = await self._choose_next_tool(current_tool, next_tools)
+            next_tool = self._choose_next_tool(current_tool, next_tools)
             path.append(next_tool)
+            visited.add(next_tool)
             current_tool = next_tool
         
         return path
     
-    async def _choose_next_tool(self, current_tool: str, candidates: List[str]) -> str:
+    def _choose_next_tool(self, current_tool: str, candidates: List[str]) -> str:
         """Choose the most likely next tool in sequence."""
-        current_lower = current_tool.lower()
+        current = self._match_keywords(current_tool)
         
         # Priority rules based on common patterns
-        if "secret" in current_lower:
+        if "secret" in current:
             # After secret, usually comes URL building
-            for candidate in candidates:
-                if "url" in candidate.lower():
-                    return candidate
-        
-        elif "url" in current_lower:
+            wanted = {"url"}
+        elif "url" in current:
             # After URL, usually comes HTTP request
-            for candidate in candidates:
-                if "http" in candidate.lower() or "request" in candidate.lower():
-                    return candidate
-        
-        elif "http" in current_lower or "request" in current_lower:
+            wanted = {"http", "request"}
+        elif current & {"http", "request"}:
             # After HTTP, usually comes data extraction
-            for candidate in candidates:
-                if "extract" in candidate.lower() or "parse" in candidate.lower():
-                    return candidate
-        
-        elif "extract" in current_lower:
+            wanted = {"extract", "parse"}
+        elif "extract" in current:
             # After extraction, usually comes formatting
-            for candidate in candidates:
-                if "format" in candidate.lower():
-                    return candidate
+            wanted = {"format"}
+        else:
+            wanted = set()
+        
+        for candidate in candidates:
+            if self._match_keywords(candidate) & wanted:
+                return candidate
         
         # Default: return first candidate
         return candidates[0] if candidates else current_tool
     
-    async def _generate_workflow_patterns(self, workflows: List[List[str]]) -> List[WorkflowPattern]:
+    def _generate_workflow_patterns(self, workflows: List[List[str]]) -> List[WorkflowPattern]:
         """Generate workflow patterns with descriptions."""
         patterns = []
         
         for i, workflow in enumerate(workflows):
+            # Interned, immutable sequence: step dependency prefixes share its names
+            workflow = tuple(sys.intern(tool_name) for tool_name in workflow)
+            
             # Determine workflow type and triggers
-            workflow_type, triggers = await self._classify_workflow(workflow)
+            workflow_type, triggers = self._classify_workflow(workflow)
             
             # Build workflow steps
             steps = []
             for j, tool_name in enumerate(workflow):
                 step = WorkflowStep(
                     tool_name=tool_name,
-                    purpose=await self._infer_tool_purpose(tool_name),
+                    purpose=self._infer_tool_purpose(tool_name),
                     dependencies=workflow[:j],  # Previous tools in sequence
                     outputs=[],  # Will be filled if needed
                     position=j + 1
@@ -186,57 +224,58 @@ class WorkflowInference:
             pattern = WorkflowPattern(
                 name=f"{workflow_type}_workflow",
                 steps=steps,
-                description=await self._generate_workflow_description(workflow, workflow_type),
+                description=self._generate_workflow_description(workflow, workflow_type),
                 triggers=triggers
             )
             patterns.append(pattern)
         
         return patterns
     
-    async def _classify_workflow(self, workflow: List[str]) -> Tuple[str, List[str]]:
+    def _classify_workflow(self, workflow: Tuple[str, ...]) -> Tuple[str, Tuple[str, ...]]:
         """Classify workflow type and determine query triggers."""
-        workflow_text = " ".join(workflow).lower()
+        keywords = frozenset().union(*(self._match_keywords(name) for name in workflow))
         
         # API Integration Pattern
-        if any(keyword in workflow_text for keyword in ["secret", "url", "http", "request"]):
-            triggers = ["data", "information", "get", "fetch", "what", "show"]
-            return "api_integration", triggers
+        if keywords & API_KWS:
+            return "api_integration", API_TRIGGERS
         
         # Data Processing Pattern
-        elif any(keyword in workflow_text for keyword in ["process", "format", "extract"]):
-            triggers = ["process", "analyze", "format", "parse"]
-            return "data_processing", triggers
+        elif keywords & DATA_KWS:
+            return "data_processing", DATA_TRIGGERS
         
         # AI Enhanced Pattern
-        elif "ai" in workflow_text:
-            triggers = ["recommend", "suggest", "what should", "advice"]
-            return "ai_enhanced", triggers
+        elif keywords & AI_KWS:
+            return "ai_enhanced", AI_TRIGGERS
         
         else:
-            return "general", ["help", "do", "can you"]
+            return "general", GENERAL_TRIGGERS
     
-    async def _infer_tool_purpose(self, tool_name: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _infer_tool_purpose(tool_name: str) -> str:
         """Infer the purpose of a tool from its name."""
-        name_lower = tool_name.lower()
+        keywords = WorkflowInference._match_keywords(tool_name)
         
-        if "secret" in name_lower:
+        if "secret" in keywords:
             return "Retrieve authentication credentials"
-        elif "url" in name_lower:
+        elif "url" in keywords:
             return "Build API endpoint URL"
-        elif "http" in name_lower or "request" in name_lower:
+        elif keywords & {"http", "request"}:
             return "Make external API call"
-        elif "extract" in name_lower:
+        elif "extract" in keywords:
             return "Extract specific data fields"
-        elif "format" in name_lower:
+        elif "format" in keywords:
             return "Format data for human reading"
-        elif "ai" in name_lower:
+        elif "ai" in keywords:
             return "Generate AI-enhanced insights"
-        elif "cache" in name_lower:
+        elif "cache" in keywords:
             return "Cache data for performance"
         else:
             return f"Execute {tool_name} operation"
     
-    async def _generate_workflow_description(self, workflow: List[str], workflow_type: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _generate_workflow_description(workflow: Tuple[str, ...], workflow_type: str) -> str:
         """Generate a description of the workflow."""
         if workflow_type == "api_integration":
             return f"Complete {len(workflow)}-step API integration: " + " → ".join(workflow)
@@ -248,40 +287,49 @@ class DynamicPromptGenerator:
     
     def __init__(self):
         self.workflow_inference = WorkflowInference()
+        self._prompt_cache: Dict[Tuple[Optional[str], Tuple[str, ...]], str] = {}
     
     async def generate_system_prompt(self, profile: ServerProfile, tools) -> str:
         """Generate dynamic system prompt based on server analysis."""
+        # Same domain and tool set always yields the same prompt
+        cache_key = (profile.domain, tuple(sorted(tool.name for tool in tools)))
+        if cache_key in self._prompt_cache:
+            logger.info(f"🧠 Reusing cached system prompt for {profile.domain} domain")
+            return self._prompt_cache[cache_key]
+        
         logger.info(f"🧠 Generating dynamic system prompt for {profile.domain} domain...")
         
         # Infer workflows from tool analysis
-        workflows = await self.workflow_inference.infer_workflows(tools)
-        
-        # Build dynamic prompt sections
-        sections = [
-            await self._generate_header(profile),
-            await self._generate_workflow_instructions(workflows, profile),
-            await self._generate_tool_categories(profile),
-            await self._generate_continuation_rules(workflows),
-            await self._generate_domain_specific_rules(profile, workflows)
-        ]
-        
-        prompt = "\n\n".join(filter(None, sections))
+        workflows = self.workflow_inference.infer_workflows(tools)
+        
+        # Build dynamic prompt sections; each helper appends only non-empty sections
+        parts: List[str] = []
+        self._generate_header(profile, parts)
+        self._generate_workflow_instructions(workflows, profile, parts)
+        self._generate_tool_categories(profile, parts)
+        self._generate_continuation_rules(workflows, parts)
+        self._generate_domain_specific_rules(profile, workflows, parts)
+        
+        prompt = "\n\n".join(parts)
+        self._prompt_cache[cache_key] = prompt
         logger.info(f"✅ Generated {len(prompt)} character dynamic system prompt")
         return prompt
     
-    async def _generate_header(self, profile: ServerProfile) -> str:
+    def _generate_header(self, profile: ServerProfile, parts: List[str]) -> None:
         """Generate dynamic header based on domain."""
         domain = profile.domain or "general purpose"
         tool_count = len(profile.tools)
         
-        return f"""You are an intelligent {domain} agent with access to {tool_count} specialized tools.
+        parts.append(f"""You are an intelligent {domain} agent with access to {tool_count} specialized tools.
 
-🎯 CRITICAL: Most tasks require MULTIPLE tool calls in sequence. Break every task into atomic steps and execute complete workflows."""
+🎯 CRITICAL: Most tasks require MULTIPLE tool calls in sequence. Break every task into atomic steps and execute complete workflows.""")
     
-    async def _generate_workflow_instructions(self, workflows: List[WorkflowPattern], profile: ServerProfile) -> str:
+    def _generate_workflow_instructions(self, workflows: List[WorkflowPattern], profile: ServerProfile,
+                                        parts: List[str]) -> None:
         """Generate workflow instructions based on discovered patterns."""
         if not workflows:
-            return "Execute tools in logical sequence based on dependencies."
+            parts.append("Execute tools in logical sequence based on dependencies.")
+            return
         
         instructions = ["📋 DISCOVERED WORKFLOWS:"]
         
@@ -295,9 +343,9 @@ class DynamicPromptGenerator:
         
         instructions.append("\n⚠️ Execute ALL steps in discovered workflows - don't stop after the first tool.")
         
-        return "\n".join(instructions)
+        parts.append("\n".join(instructions))
     
-    async def _generate_tool_categories(self, profile: ServerProfile) -> str:
+    def _generate_tool_categories(self, profile: ServerProfile, parts: List[str]) -> None:
         """Generate tool category information."""
         categories = []
         for category, tools in profile.tool_categories.items():
@@ -306,20 +354,20 @@ class DynamicPromptGenerator:
                 categories.append(f"• {category.value.title()}: {tool_list}")
         
         if categories:
-            return "🔧 AVAILABLE TOOL CATEGORIES:\n" + "\n".join(categories)
-        return ""
+            parts.append("🔧 AVAILABLE TOOL CATEGORIES:\n" + "\n".join(categories))
     
-    async def _generate_continuation_rules(self, workflows: List[WorkflowPattern]) -> str:
+    def _generate_continuation_rules(self, workflows: List[WorkflowPattern], parts: List[str]) -> None:
         """Generate continuation rules based on workflow analysis."""
         max_steps = max([len(w.steps) for w in workflows]) if workflows else 3
         
-        return f"""⚡ EXECUTION RULES:
+        parts.append(f"""⚡ EXECUTION RULES:
 • Execute up to {max_steps} tools in sequence without stopping
 • Continue automatically between workflow steps
 • Don't ask permission between tool calls
-• Complete entire workflows before providing final response"""
+• Complete entire workflows before providing final response""")
     
-    async def _generate_domain_specific_rules(self, profile: ServerProfile, workflows: List[WorkflowPattern]) -> str:
+    def _generate_domain_specific_rules(self, profile: ServerProfile, workflows: List[WorkflowPattern],
+                                        parts: List[str]) -> None:
         """Generate domain-specific rules based on analysis."""
         rules = []
         
@@ -345,6 +393,4 @@ class DynamicPromptGenerator:
             rules.append("🤖 Provide AI-enhanced insights when available")
         
         if rules:
-            return "🎯 DOMAIN-SPECIFIC GUIDANCE:\n" + "\n".join(rules)
-        
-        return ""
\ No newline at end of file
+            parts.append("🎯 DOMAIN-SPECIFIC GUIDANCE:\n" + "\n".join(rules))
\ No newline at end of file
@@ -1,7 +1,8 @@
 """Security manager for API keys and authentication secrets only."""
 import asyncio
 import logging
-from typing import Optional, Dict
+import time
+from typing import Optional, Dict, Tuple
 from azure.keyvault.secrets import SecretClient
 from azure.identity import DefaultAzureCredential
 from azure.core.exceptions import ResourceNotFoundError
@@ -11,13 +12,19 @@ from azure.core.exceptions import ResourceNotFoundError
 # Use standard logger instead of custom one to avoid circular import
 logger = logging.getLogger(__name__)
 
+# Upper bound on cached secrets; oldest entries are evicted first
+MAX_CACHED_SECRETS = 256
+
 class SecurityManager:
     """Handles ONLY authentication secrets - not configuration."""
     
     def __init__(self, config):
         self.config = config
         self._secret_client: Optional[SecretClient] = None
-        self._secret_cache: Dict[str, str] = {}
+        # secret name -> (value, monotonic expiry time)
+        self._secret_cache: Dict[str, Tuple[str, float]] = {}
+        # secret name -> [lock, callers holding or waiting on it]; dropped when unused
+        self._secret_locks: Dict[str, list] = {}
         self._initialization_error: Optional[Exception] = None  # Track init errors
     
     async def initialize(self) -> None:
@@ -29,9 +36,6 @@ class SecurityManager:
         if not self.config.azure_key_vault_name:
             raise ValueError("Azure Key Vault name not configured")
         
-        if not self.config.azure_key_vault_name:
-            raise ValueError("Azure Key Vault name not configured")
-        
         logger.info(f"Initializing Key Vault connection to: {self.config.azure_key_vault_name}")
             
         # Try to create credential
@@ -46,13 +50,12 @@ class SecurityManager:
         self._secret_client = SecretClient(vault_url=vault_url, credential=credential)
         logger.info("SecretClient created successfully")
             
-        # Test the connection by trying to list secrets (just to verify access)
-        # try:
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None,
-            lambda: list(self._secret_client.list_properties_of_secrets())
-        )
+        # Verify access with a single cheap lookup instead of listing every secret;
+        # a missing secret proves auth worked, auth failures still propagate
+        try:
+            await asyncio.to_thread(self._secret_client.get_secret, "healthcheck-probe")
+        except ResourceNotFoundError:
+            pass
         logger.info(f"✅ Successfully connected to Key Vault: {self.config.azure_key_vault_name}")
   
     async def get_secret(self, secret_name: str) -> str:
@@ -62,19 +65,49 @@ class SecurityManager:
             raise RuntimeError("Key Vault client not initialized - call initialize() first")
         
         # Check cache first
-        if secret_name in self._secret_cache:
+        cached = self._get_cached(secret_name)
+        if cached is not None:
             logger.info(f"Retrieved cached secret: {secret_name}")
-            return self._secret_cache[secret_name]
+            return cached
         
-        # try:
-        logger.info(f"Retrieving secret '{secret_name}' from Key Vault")
-        loop = asyncio.get_event_loop()
-        secret = await loop.run_in_executor(
-            None,
-            lambda: self._secret_client.get_secret(secret_name)
-        )
+        # Only one coroutine fetches a given secret; the rest wait for its result
+        entry = self._secret_locks.setdefault(secret_name, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                cached = self._get_cached(secret_name)
+                if cached is not None:
+                    return cached
+                
+                logger.info(f"Retrieving secret '{secret_name}' from Key Vault")
+                secret = await asyncio.to_thread(self._secret_client.get_secret, secret_name)
+                
+                # Cache the secret
+                self._store(secret_name, secret.value)
+                logger.info(f"✅ Successfully retrieved secret: {secret_name}")
+                return secret.value
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                # Last caller out - don't keep a lock for every name ever requested
+                del self._secret_locks[secret_name]
+    
+    def _get_cached(self, secret_name: str) -> Optional[str]:
+        """Return a cached secret value, dropping it once its TTL has expired."""
+        entry = self._secret_cache.get(secret_name)
+        if entry is None:
+            return None
         
-        # Cache the secret
-        self._secret_cache[secret_name] = secret.value
-        logger.info(f"✅ Successfully retrieved secret: {secret_name}")
-        return secret.value
\ No newline at end of file
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            # Expired - force a refetch so rotated secrets are picked up
+            del self._secret_cache[secret_name]
+            return None
+        return value
+    
+    def _store(self, secret_name: str, value: str) -> None:
+        """Cache a secret value, evicting the oldest entry when full."""
+        self._secret_cache.pop(secret_name, None)
+        if len(self._secret_cache) >= MAX_CACHED_SECRETS:
+            del self._secret_cache[next(iter(self._secret_cache))]
+        self._secret_cache[secret_name] = (value, time.monotonic() + self.config.secret_cache_ttl)
\ No newline at end of file
@@ -14,7 +14,25 @@ if str(project_root) not in sys.path:
 # Load .env for non-sensitive configuration
 load_dotenv()
 
-@dataclass
+def _parse_bool(value: str) -> bool:
+    """Parse a 'true'/'false' environment flag."""
+    return value.lower() == 'true'
+
+# (environment variable, config attribute, parser) for non-secret settings
+_ENV_SETTINGS = (
+    ('OPENAI_MODEL', 'openai_model', str),
+    ('MAX_TOKENS', 'max_tokens', int),
+    ('TEMPERATURE', 'temperature', float),
+    ('CONNECTION_TIMEOUT', 'connection_timeout', int),
+    ('RETRY_ATTEMPTS', 'retry_attempts', int),
+    ('RETRY_MAX_DELAY', 'retry_max_delay', float),
+    ('SECRET_CACHE_TTL', 'secret_cache_ttl', int),
+    ('LOG_LEVEL', 'log_level', str),
+    ('AUTO_DISCOVER_SERVERS', 'auto_discover_servers', _parse_bool),
+    ('MAX_CONCURRENT_SERVERS', 'max_concurrent_servers', int),
+)
+
+@dataclass(slots=True, kw_only=True)
 class UniversalMCPConfig:
     """Universal MCP Client configuration - secrets always from Key Vault."""
     
@@ -27,11 +45,13 @@ class UniversalMCPConfig:
     connection_timeout: int = 30
     retry_attempts: int = 3
     retry_delay: float = 1.0
+    retry_max_delay: float = 30.0  # Cap for jittered exponential backoff
     
     # Universal Client Configuration
     auto_discover_servers: bool = True
     max_concurrent_servers: int = 5
     server_profile_cache_ttl: int = 3600  # 1 hour
+    secret_cache_ttl: int = 3600  # 1 hour - rotated secrets are refetched after this
     
     # Application Configuration
     log_level: str = "INFO"
@@ -49,18 +69,12 @@ class UniversalMCPConfig:
         """Create configuration for universal MCP client."""
         config = cls()
         
-        # Load configuration from environment
-        config.openai_model = os.getenv('OPENAI_MODEL', config.openai_model)
-        config.max_tokens = int(os.getenv('MAX_TOKENS', str(config.max_tokens)))
-        config.temperature = float(os.getenv('TEMPERATURE', str(config.temperature)))
-        
-        config.connection_timeout = int(os.getenv('CONNECTION_TIMEOUT', str(config.connection_timeout)))
-        config.retry_attempts = int(os.getenv('RETRY_ATTEMPTS', str(config.retry_attempts)))
-        config.log_level = os.getenv('LOG_LEVEL', config.log_level)
-        
-        # Universal client settings
-        config.auto_discover_servers = os.getenv('AUTO_DISCOVER_SERVERS', 'true').lower() == 'true'
-        config.max_concurrent_servers = int(os.getenv('MAX_CONCURRENT_SERVERS', str(config.max_concurrent_servers)))
+        # Load configuration from environment; unset variables keep the defaults
+        env = os.environ
+        for env_var, attr, cast in _ENV_SETTINGS:
+            value = env.get(env_var)
+            if value is not None:
+                setattr(config, attr, cast(value))
         
         # Azure Key Vault setup
         config.azure_key_vault_name = os.getenv('AZURE_KEY_VAULT_NAME')
@@ -68,14 +82,19 @@ class UniversalMCPConfig:
         
         return config
     
-    async def get_openai_api_key(self) -> str:
-        """Get OpenAI API key from Key Vault."""
+    async def _get_security_manager(self) -> 'SecurityManager':
+        """Create and initialize the security manager on first use."""
         if not self._security_manager:
             from src.config.security import SecurityManager
             self._security_manager = SecurityManager(self)
             await self._security_manager.initialize()
         
-        return await self._security_manager.get_secret('openai-api-key')
+        return self._security_manager
+    
+    async def get_openai_api_key(self) -> str:
+        """Get OpenAI API key from Key Vault."""
+        security_manager = await self._get_security_manager()
+        return await security_manager.get_secret('openai-api-key')
     
     def validate(self) -> None:
         """Validate configuration."""
@@ -1,7 +1,9 @@
 """Advanced connection management for MCP servers."""
 import asyncio
+import logging
+import random
+import sys
 from typing import Optional, List, Dict, Any
-from contextlib import AsyncExitStack
 from pathlib import Path
 
 from mcp import ClientSession, StdioServerParameters
@@ -10,10 +12,14 @@ from mcp.types import Tool
 
 from src.config.settings import UniversalMCPConfig
 from src.utils.log_config import get_logger
-from src.utils.exceptions import MCPConnectionError
+from src.utils.exceptions import MCPConnectionError, ServerValidationError
 
 logger = get_logger(__name__)
 
+# Launch command for each supported server script type
+_COMMAND_BY_SUFFIX = {".py": sys.executable, ".js": "node"}
+SUPPORTED_SERVER_SUFFIXES = tuple(_COMMAND_BY_SUFFIX)  # In order of preference
+
 class MCPConnection:
     """Manages individual MCP server connection."""
     
@@ -23,22 +29,33 @@ class MCPConnection:
         self.config = config
         
         self.session: Optional[ClientSession] = None
-        self.exit_stack = AsyncExitStack()
         self.tools: List[Tool] = []
+        self._tool_index: Dict[str, Tool] = {}
         self._is_connected = False
+        
+        # The MCP transport and session are anyio contexts that must be exited by
+        # the task that entered them, so a dedicated owner task holds them open.
+        # That lets connect() and disconnect() be awaited from any task.
+        self._session_task: Optional[asyncio.Task] = None
+        self._closing = asyncio.Event()
     
     async def connect(self) -> None:
         """Connect to the MCP server with retry logic."""
+        # Capped exponential backoff with decorrelated jitter, so servers that
+        # fail together during concurrent discovery don't retry in lockstep
+        base_delay = self.config.retry_delay
+        delay = base_delay
         for attempt in range(self.config.retry_attempts):
             try:
                 await self._attempt_connection()
                 self._is_connected = True
-                logger.info(f"Connected to server '{self.server_id}' (attempt {attempt + 1})")
+                logger.info("Connected to server '%s' (attempt %d)", self.server_id, attempt + 1)
                 return
             except Exception as e:
-                logger.warning(f"Connection attempt {attempt + 1} failed: {e}")
+                logger.warning("Connection attempt %d failed: %s", attempt + 1, e)
                 if attempt < self.config.retry_attempts - 1:
-                    await asyncio.sleep(self.config.retry_delay * (attempt + 1))
+                    delay = min(self.config.retry_max_delay, random.uniform(base_delay, delay * 3))
+                    await asyncio.sleep(delay)
                 else:
                     raise MCPConnectionError(f"Failed to connect to '{self.server_id}' after {self.config.retry_attempts} attempts")
     
@@ -49,15 +66,12 @@ class MCPConnection:
             raise FileNotFoundError(f"Server script not found: {self.server_path}")
         
         # Determine command based on file extension
-        if self.server_path.suffix == '.py':
-            command = "python"
-        elif self.server_path.suffix == '.js':
-            command = "node"
-        else:
+        command = _COMMAND_BY_SUFFIX.get(self.server_path.suffix)
+        if command is None:
             raise ServerValidationError(f"Unsupported server script type: {self.server_path.suffix}")
         
-           # Log the exact command being run
-        logger.info(f"Running command: {command} {str(self.server_path)}")
+        # Log the exact command being run
+        logger.info("Running command: %s %s", command, self.server_path)
         
         # Set up server parameters
         server_params = StdioServerParameters(
@@ -66,48 +80,68 @@ class MCPConnection:
             env=None
         )
         
-        # Create connection with timeout
+        # Create connection; the owner task reports back once the session is ready
+        self._closing = asyncio.Event()
+        ready = asyncio.get_running_loop().create_future()
+        self._session_task = asyncio.create_task(self._run_session(server_params, ready))
+        
         try:
-            logger.info("Creating stdio transport...")
-            stdio_transport = await asyncio.wait_for(
-                self.exit_stack.enter_async_context(stdio_client(server_params)),
-                timeout=self.config.connection_timeout
-            )
-            self.stdio, self.write = stdio_transport
-            logger.info("stdio transport created successfully")
-            
-            # Initialize session
-            logger.info("Creating client session...")
-            self.session = await self.exit_stack.enter_async_context(
-                ClientSession(self.stdio, self.write)
-            )
-            logger.info("Client session created successfully")
-
-            logger.info("Initializing session...")
-            await self.session.initialize()
-            logger.info("Session initialized successfully")
-            
-            # List available tools
-            response = await self.session.list_tools()
-            self.tools = response.tools
-            
-            logger.info(f"Server '{self.server_id}' initialized with {len(self.tools)} tools: {[tool.name for tool in self.tools]}")
-            
-        except asyncio.TimeoutError:
+            await ready
+        except asyncio.CancelledError:
+            self._session_task.cancel()
+            raise
+        except TimeoutError:
             raise ConnectionError(f"Connection timeout after {self.config.connection_timeout}s")
         except Exception as e:
-            logger.error(f"Connection failed with error: {e}")
-            logger.error(f"Error type: {type(e).__name__}")
+            logger.error("Connection failed with error: %s", e)
+            logger.error("Error type: %s", type(e).__name__)
             raise MCPConnectionError(f"Connection failed: {e}")
     
+    async def _run_session(self, server_params: StdioServerParameters, ready: asyncio.Future) -> None:
+        """Open the transport and session, then hold them until disconnect."""
+        try:
+            # One deadline covers transport startup through the tool listing and
+            # is lifted once the session is ready
+            async with asyncio.timeout(self.config.connection_timeout) as setup_deadline:
+                logger.info("Creating stdio transport...")
+                async with stdio_client(server_params) as (self.stdio, self.write):
+                    logger.info("stdio transport created successfully")
+                    
+                    # Initialize session
+                    logger.info("Creating client session...")
+                    async with ClientSession(self.stdio, self.write) as self.session:
+                        logger.info("Client session created successfully")
+                        
+                        logger.info("Initializing session...")
+                        await self.session.initialize()
+                        logger.info("Session initialized successfully")
+                        
+                        # List available tools
+                        response = await self.session.list_tools()
+                        self.tools = response.tools
+                        self._tool_index = {tool.name: tool for tool in self.tools}
+                        
+                        logger.info("Server '%s' initialized with %d tools", self.server_id, len(self.tools))
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Server '%s' tools: %s", self.server_id, [tool.name for tool in self.tools])
+                        
+                        setup_deadline.reschedule(None)
+                        ready.set_result(None)
+                        await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.error("Session for server '%s' ended with error: %s", self.server_id, e)
+    
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
         """Execute a tool with error handling."""
         if not self._is_connected or not self.session:
             raise ConnectionError("Not connected to server")
         
         # Validate tool exists
-        if not any(tool.name == tool_name for tool in self.tools):
-            available_tools = [tool.name for tool in self.tools]
+        if tool_name not in self._tool_index:
+            available_tools = list(self._tool_index)
             raise ValueError(f"Tool '{tool_name}' not available. Available tools: {available_tools}")
         
         try:
@@ -122,7 +156,10 @@ class MCPConnection:
     async def disconnect(self) -> None:
         """Gracefully disconnect from server."""
         try:
-            await self.exit_stack.aclose()
+            if self._session_task is not None:
+                self._closing.set()
+                await self._session_task
+                self._session_task = None
             self._is_connected = False
             logger.info(f"Disconnected from server '{self.server_id}'")
         except Exception as e:
@@ -1,5 +1,6 @@
 """Multi-server connection management for Universal MCP Client."""
-from typing import Dict, List, Optional
+import asyncio
+from typing import Dict, List, Optional, Set
 from src.core.connection import MCPConnection
 from src.config.settings import UniversalMCPConfig
 from src.utils.log_config import get_logger
@@ -13,6 +14,7 @@ class ServerManager:
     def __init__(self, config: UniversalMCPConfig):
         self.config = config
         self.connections: Dict[str, MCPConnection] = {}
+        self._connecting: Set[str] = set()  # Ids reserved while their connect() is in flight
         self._initialized = False
     
     async def initialize(self) -> None:
@@ -29,10 +31,14 @@ class ServerManager:
         if server_id in self.connections:
             logger.warning(f"Server '{server_id}' already connected")
             return
+        if server_id in self._connecting:
+            raise MCPConnectionError(f"Server '{server_id}' is already being connected")
         
         logger.info(f"Connecting to server '{server_id}' at '{server_path}'")
         connection = MCPConnection(server_id, server_path, self.config)
         
+        # Reserve the id before awaiting so a concurrent connect can't replace this connection
+        self._connecting.add(server_id)
         try:
             await connection.connect()
             self.connections[server_id] = connection
@@ -41,6 +47,8 @@ class ServerManager:
             logger.error(f"Failed to connect to server '{server_id}': {e}")
             await connection.disconnect()
             raise MCPConnectionError(f"Failed to connect to '{server_id}': {e}")
+        finally:
+            self._connecting.discard(server_id)
     
     def get_connection(self, server_id: str) -> MCPConnection:
         """Get connection for a specific server."""
@@ -59,7 +67,10 @@ class ServerManager:
     async def shutdown(self) -> None:
         """Shutdown all server connections."""
         logger.info("Shutting down all server connections...")
-        for server_id in list(self.connections.keys()):
-            await self.connections[server_id].disconnect()
-            del self.connections[server_id]
+        # Disconnect concurrently; MCPConnection.disconnect logs its own errors
+        await asyncio.gather(
+            *(connection.disconnect() for connection in self.connections.values()),
+            return_exceptions=True
+        )
+        self.connections.clear()
         logger.info("All server connections shutdown")
\ No newline at end of file
@@ -1,10 +1,29 @@
 """Universal MCP Client - works with any MCP server through introspection."""
 import asyncio
-from typing import Dict, List, Optional, Any
+import importlib.util
+import logging
+import os
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 
+try:
+    # C-accelerated parsing of tool-call arguments when available
+    import orjson
+    _json_loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    import json
+    _json_loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
+import httpx
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletionMessageToolCall
+
+from src.core.connection import SUPPORTED_SERVER_SUFFIXES
 from src.core.server_manager import ServerManager
 from src.discovery.server_profiler import ServerProfiler, ServerProfile
+from src.adapters.prompt_generator import DynamicPromptGenerator
 from src.intelligence.query_router import QueryRouter
 from src.intelligence.workflow_planner import WorkflowPlanner
 from src.config.settings import UniversalMCPConfig
@@ -13,6 +32,21 @@ from src.utils.exceptions import UniversalMCPError
 
 logger = get_logger(__name__)
 
+# One bit per core workflow step, keyed on the tool-name fragment that identifies it
+_STEP_BITS = {
+    "get_secret": 1,
+    "build_api_url": 2,
+    "http_request": 4,
+    "extract_data_fields": 8,
+    "format_data": 16,
+}
+_WORKFLOW_STEP_COUNT = len(_STEP_BITS)
+_ALL_WORKFLOW_STEPS = (1 << _WORKFLOW_STEP_COUNT) - 1
+
+# Tool results older than this many assistant turns are resent as a stub
+_MAX_TOOL_ROUNDS_IN_CONTEXT = 3
+_TRUNCATED_TOOL_RESULT = "[truncated prior result]"
+
 class UniversalMCPClient:
     """Universal MCP client that adapts to any server through introspection."""
     
@@ -25,9 +59,19 @@ class UniversalMCPClient:
         self.server_profiler = ServerProfiler()
         self.query_router = QueryRouter()
         self.workflow_planner = WorkflowPlanner()
+        self._prompt_generator = DynamicPromptGenerator()
         
         # State
         self.server_profiles: Dict[str, ServerProfile] = {}
+        # Parallel routing arrays in connect order: _server_domains[i] belongs to _server_ids[i]
+        self._server_ids: List[str] = []
+        self._server_domains: List[str] = []
+        # Per-server OpenAI tool definitions, built once at connect time
+        self._openai_tools: Dict[str, List[dict]] = {}  # Includes _server_id/_original_name
+        self._openai_tool_payloads: Dict[str, List[dict]] = {}  # Sent as tools=...
+        self._openai_tool_index: Dict[str, Dict[str, Tuple[str, str]]] = {}  # name -> (server_id, original_name)
+        self._system_prompts: Dict[str, str] = {}  # Generated once per server profile
+        self.openai_client: Optional[AsyncOpenAI] = None  # Created in initialize()
         self._initialized = False
     
     async def initialize(self) -> None:
@@ -37,6 +81,17 @@ class UniversalMCPClient:
         
         try:
             await self.server_manager.initialize()
+            
+            api_key = await self.config.get_openai_api_key()
+            
+            # One OpenAI client whose connection pool is shared by every completion.
+            # No timeout here, so the OpenAI client keeps its own long read timeout.
+            http_client = httpx.AsyncClient(
+                http2=importlib.util.find_spec("h2") is not None,  # HTTP/2 needs the optional h2 package
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+            )
+            self.openai_client = AsyncOpenAI(api_key=api_key, http_client=http_client)
+            
             self._initialized = True
             logger.info("Universal MCP Client initialized successfully")
         except Exception as e:
@@ -55,8 +110,11 @@ class UniversalMCPClient:
         
         # Build server profile through introspection
         connection = self.server_manager.get_connection(server_id)
-        profile = await self.server_profiler.profile_server(connection)
+        profile = self.server_profiler.profile_server(connection)
+        self._register_routing(server_id, profile)
         self.server_profiles[server_id] = profile
+        self._build_openai_tools(server_id, connection)
+        self._system_prompts[server_id] = await self._generate_system_prompt(profile)
         
         logger.info(f"Server '{server_id}' profiled: {profile.domain} domain with {len(profile.tools)} tools")
     
@@ -68,20 +126,33 @@ class UniversalMCPClient:
         logger.info(f"Auto-discovering servers in: {directory}")
         
         # Find potential server scripts
-        server_files = []
-        for pattern in ["*.py", "*.js"]:
-            server_files.extend(directory.glob(pattern))
+        with os.scandir(directory) as entries:
+            server_files = [
+                Path(entry.path) for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1] in SUPPORTED_SERVER_SUFFIXES
+            ]
         
         if not server_files:
             raise UniversalMCPError(f"No server scripts found in: {directory}")
         
-        # Connect to discovered servers
+        # Server ids are file stems, so keep one script per stem (e.g. dup.py over dup.js)
+        server_files.sort(key=lambda path: (path.stem, SUPPORTED_SERVER_SUFFIXES.index(path.suffix)))
+        servers: Dict[str, Path] = {}
         for server_file in server_files:
-            server_id = server_file.stem
-            try:
-                await self.connect_to_server(server_id, str(server_file))
-            except Exception as e:
-                logger.warning(f"Failed to connect to {server_file}: {e}")
+            if server_file.stem in servers:
+                logger.warning(f"Skipping {server_file}: server '{server_file.stem}' already discovered")
+            else:
+                servers[server_file.stem] = server_file
+        server_files = list(servers.values())
+        
+        # Connect to discovered servers concurrently - each gets its own connection
+        results = await asyncio.gather(
+            *(self.connect_to_server(server_id, str(server_file)) for server_id, server_file in servers.items()),
+            return_exceptions=True
+        )
+        for server_file, result in zip(server_files, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Failed to connect to {server_file}: {result}")
         
         if not self.server_profiles:
             raise UniversalMCPError("No servers successfully connected")
@@ -91,23 +162,18 @@ class UniversalMCPClient:
   
     async def _generate_system_prompt(self, profile: ServerProfile) -> str:
         """Generate dynamic system prompt based on server profile analysis."""
-        logger.info(f"🧠 GENERATING SYSTEM PROMPT for {profile.server_id} {profile.server_configuration} ({profile.domain})")
-
-                # ADD THIS DEBUG
-        print(f"🔍 DEBUG: Profile server_configuration: {getattr(profile, 'server_configuration', 'NOT FOUND')}")
+        logger.info("🧠 GENERATING SYSTEM PROMPT for %s (%s)", profile.server_id, profile.domain)
+        logger.debug("🧠 Profile server_configuration: %s", profile.server_configuration)
         
-        from src.adapters.prompt_generator import DynamicPromptGenerator
-        
-        generator = DynamicPromptGenerator()
         connection = self.server_manager.get_connection(profile.server_id)
         
-        logger.info(f"🧠 Analyzing {len(connection.tools)} tools for prompt generation")
+        logger.info("🧠 Analyzing %d tools for prompt generation", len(connection.tools))
         
         # Generate prompt based on actual tool analysis, not hardcoded rules
-        prompt = await generator.generate_system_prompt(profile, connection.tools)
+        prompt = await self._prompt_generator.generate_system_prompt(profile, connection.tools)
         
-        logger.info(f"🧠 Generated {len(prompt)} character system prompt")
-        logger.info(f"🧠 System prompt: {prompt}")
+        logger.info("🧠 Generated %d character system prompt", len(prompt))
+        logger.debug("🧠 System prompt: %s", prompt)
     
         return prompt
 
@@ -119,10 +185,10 @@ class UniversalMCPClient:
         logger.info(f"Processing universal query: {query}")
         
         # Analyze query and route to best server(s)
-        routing_plan = await self.query_router.route_query(query, self.server_profiles)
+        routing_plan = self.query_router.route_query(query, *self.get_routing_arrays())
         
         # Plan workflow based on query and selected servers
-        workflow = await self.workflow_planner.plan_workflow(
+        workflow = self.workflow_planner.plan_workflow(
             query, routing_plan, self.server_profiles
         )
         
@@ -140,177 +206,266 @@ class UniversalMCPClient:
         if not primary_server:
             raise UniversalMCPError("No primary server identified in workflow")
         
-        # Get the server connection and profile
-        connection = self.server_manager.get_connection(primary_server)
-        profile = self.server_profiles[primary_server]
+        # Tools for OpenAI were built when the server connected
+        tools_payload = self._openai_tool_payloads[primary_server]
+        tool_index = self._openai_tool_index[primary_server]
+        
+        # Show what we're sending to OpenAI
+        if logger.isEnabledFor(logging.DEBUG):
+            for tool in self._openai_tools[primary_server]:
+                if "secret" in tool["function"]["name"]:
+                    logger.debug("🔍 Secret tool sent to OpenAI: %s", tool["function"])
+
+        # System prompt was generated from the server profile at connect time
+        system_prompt = self._system_prompts[primary_server]
         
-        # Build available tools for OpenAI
+        # 🔧 FIX: Use the original query from workflow
+        original_query = workflow.get("original_query", "Process this request")
+        
+        # Execute using OpenAI tool calling
+        return await self._execute_openai_workflow(original_query, tool_index, tools_payload, system_prompt)
+    
+    def _build_openai_tools(self, server_id: str, connection) -> None:
+        """Build and cache the OpenAI tool definitions for a connected server."""
         available_tools = []
         for tool in connection.tools:
             available_tools.append({
                 "type": "function",
                 "function": {
-                    "name": f"{primary_server}_{tool.name}",
-                    "description": f"[{primary_server}] {tool.description}",
+                    "name": f"{server_id}_{tool.name}",
+                    "description": f"[{server_id}] {tool.description}",
                     "parameters": tool.inputSchema
                 },
-                "_server_id": primary_server,
+                "_server_id": server_id,
                 "_original_name": tool.name
             })
         
-        # Show what we're sending to OpenAI
-        for tool in available_tools:
-            if "secret" in tool["function"]["name"]:
-                print(f"🔍 DEBUG: Secret tool sent to OpenAI: {tool['function']}")
-
-        # 🎯 HERE: Generate dynamic system prompt based on server profile
-        system_prompt = await self._generate_system_prompt(profile)
-        
-        # 🔧 FIX: Use the original query from workflow
-        original_query = workflow.get("original_query", "Process this request")
-        
-        # Execute using OpenAI tool calling
-        return await self._execute_openai_workflow(original_query, available_tools, system_prompt)
+        self._openai_tools[server_id] = available_tools
+        self._openai_tool_payloads[server_id] = [
+            {k: v for k, v in tool.items() if not k.startswith('_')} for tool in available_tools
+        ]
+        self._openai_tool_index[server_id] = {
+            tool["function"]["name"]: (tool["_server_id"], tool["_original_name"]) for tool in available_tools
+        }
     
-    async def _execute_openai_workflow(self, query: str, available_tools: List[dict], system_prompt: str) -> str:
+    async def _execute_openai_workflow(self, query: str, tool_index: Dict[str, Tuple[str, str]],
+                                       tools_payload: List[dict], system_prompt: str) -> str:
         """Execute workflow using OpenAI tool calling (adapted from your proven client)."""
-        # Initialize OpenAI client if needed
-        if not hasattr(self, 'openai_client') or not self.openai_client:
-            from openai import AsyncOpenAI
-            api_key = await self.config.get_openai_api_key()
-            self.openai_client = AsyncOpenAI(api_key=api_key)
-        
         # Build messages
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": query}
         ]
         
-        # Call OpenAI with tools
-        response = await self.openai_client.chat.completions.create(
-            model=self.config.openai_model,
-            max_tokens=self.config.max_tokens,
-            temperature=self.config.temperature,
-            messages=messages,
-            tools=[{k: v for k, v in tool.items() if not k.startswith('_')} for tool in available_tools]
-        )
-        
         # Process response (adapt your existing _process_response logic)
-        return await self._process_universal_response(response, messages, available_tools)
+        return await self._process_universal_response(messages, tool_index, tools_payload)
 
-    async def _process_universal_response(self, response, messages, available_tools):
+    async def _process_universal_response(self, messages, tool_index, tools_payload):
         """Process OpenAI response with tool execution (simplified from your proven pattern)."""
         final_text = []
-        message = response.choices[0].message
-        
-        if message.content:
-            final_text.append(message.content)
+        workflow_state = 0  # _STEP_BITS of every tool requested so far
+        content, tool_calls, pending = await self._stream_completion(messages, tool_index, tools_payload)
         
-        # Handle tool calls
-        if message.tool_calls:
+        # Keep going turn by turn until the model stops calling tools or the workflow completes
+        while True:
+            if content:
+                final_text.append(content)
+            
+            # Handle tool calls
+            if not tool_calls:
+                break
+            
             messages.append({
                 "role": "assistant",
-                "content": message.content,
-                "tool_calls": [tc.model_dump() for tc in message.tool_calls]
+                "content": content,
+                "tool_calls": [tc.model_dump() for tc in tool_calls]
             })
+            for tool_call in tool_calls:
+                if workflow_state == _ALL_WORKFLOW_STEPS:
+                    break
+                workflow_state = self._step_bits(tool_call.function.name, workflow_state)
             
-            # Execute each tool call
-            for tool_call in message.tool_calls:
-                await self._execute_single_tool(tool_call, available_tools, messages, final_text)
+            # Tool calls were started while the completion streamed in; record the
+            # results in tool_calls order so every tool_call_id follows its assistant message
+            results = await asyncio.gather(*pending)
+            for tool_message, log_line, _ in results:
+                messages.append(tool_message)
+                if log_line:
+                    final_text.append(log_line)
             
             # Check if workflow incomplete and continue (your proven continuation logic)
-            if self._workflow_incomplete(messages):
-                messages.append({
-                    "role": "user", 
-                    "content": "Continue with the next step in the workflow."
-                })
+            if not self._workflow_incomplete(workflow_state):
+                # A completed workflow ending in format_data already produced the
+                # user-facing answer - skip the extra completion round-trip
+                formatted = None
+                if workflow_state == _ALL_WORKFLOW_STEPS:
+                    formatted = self._formatted_answer(tool_calls[-1], results[-1][2])
                 
-                # Recursive call for continuation
-                continue_response = await self.openai_client.chat.completions.create(
-                    model=self.config.openai_model,
-                    max_tokens=self.config.max_tokens,
-                    temperature=self.config.temperature,
-                    messages=messages,
-                    tools=[{k: v for k, v in tool.items() if not k.startswith('_')} for tool in available_tools]
-                )
-                
-                continuation = await self._process_universal_response(continue_response, messages, available_tools)
-                final_text.append(continuation)
-            else:
-                # Get final response
-                await self._get_final_response(messages, final_text)
+                if formatted:
+                    final_text.append(formatted)
+                else:
+                    # Get final response
+                    await self._get_final_response(messages, final_text)
+                break
+            
+            messages.append({
+                "role": "user", 
+                "content": "Continue with the next step in the workflow."
+            })
+            
+            content, tool_calls, pending = await self._stream_completion(messages, tool_index, tools_payload)
         
         return "\n".join(final_text)
 
-    async def _execute_single_tool(self, tool_call, available_tools, messages, final_text):
-        """Execute a single tool call (adapted from your proven pattern)."""
-        import json
+    async def _stream_completion(self, messages, tool_index, tools_payload
+                                 ) -> Tuple[Optional[str], List[ChatCompletionMessageToolCall], List[asyncio.Task]]:
+        """Stream one completion, starting each tool call as soon as it is complete.
+        
+        Tool call deltas arrive in index order, so a call is complete once the
+        next one begins or the stream ends. Returns the message content, the
+        tool calls and their running _execute_single_tool tasks, in order.
+        """
+        content_parts = []
+        tool_calls = []
+        pending = []
+        building = None  # [id, name, arguments] of the tool call being streamed
+        
+        def finish_tool_call():
+            tool_call = ChatCompletionMessageToolCall(
+                id=building[0],
+                type="function",
+                function={"name": building[1], "arguments": "".join(building[2])}
+            )
+            tool_calls.append(tool_call)
+            pending.append(asyncio.create_task(self._execute_single_tool(tool_call, tool_index)))
+        
+        self._trim_messages(messages)
+        try:
+            stream = await self.openai_client.chat.completions.create(
+                model=self.config.openai_model,
+                max_tokens=self.config.max_tokens,
+                temperature=self.config.temperature,
+                messages=messages,
+                tools=tools_payload,
+                stream=True
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+                for tool_delta in delta.tool_calls or ():
+                    if tool_delta.index >= len(tool_calls) + (building is not None):
+                        if building is not None:
+                            finish_tool_call()
+                        building = [tool_delta.id, "", []]
+                    function = tool_delta.function
+                    if function is not None:
+                        if function.name:
+                            building[1] += function.name
+                        if function.arguments:
+                            building[2].append(function.arguments)
+            if building is not None:
+                finish_tool_call()
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+        
+        return "".join(content_parts) or None, tool_calls, pending
+
+    @staticmethod
+    def _trim_messages(messages: List[dict], max_tool_rounds: int = _MAX_TOOL_ROUNDS_IN_CONTEXT) -> None:
+        """Stub out tool results older than the last max_tool_rounds assistant turns.
+        
+        The system prompt, the user query and every assistant message are kept,
+        and each tool_call_id keeps its tool message, so the history stays valid.
+        """
+        rounds = 0
+        for i in range(len(messages) - 1, -1, -1):
+            message = messages[i]
+            if message["role"] == "assistant" and message.get("tool_calls"):
+                rounds += 1
+            elif message["role"] == "tool" and rounds >= max_tool_rounds:
+                if message["content"] == _TRUNCATED_TOOL_RESULT:
+                    break  # Everything older was stubbed by an earlier call
+                messages[i] = {**message, "content": _TRUNCATED_TOOL_RESULT}
+
+    async def _execute_single_tool(self, tool_call, tool_index) -> Tuple[dict, Optional[str], Any]:
+        """Execute a single tool call.
         
+        Returns the tool message, an optional log line and the raw tool result
+        (None when the tool was not found or failed).
+        """
         tool_name = tool_call.function.name
         try:
-            tool_args = json.loads(tool_call.function.arguments)
-        except json.JSONDecodeError:
+            tool_args = _json_loads(tool_call.function.arguments)
+        except _JSONDecodeError:
             tool_args = {}
         
         # Find tool info
-        tool_info = next((t for t in available_tools if t["function"]["name"] == tool_name), None)
-        if not tool_info:
-            messages.append({
+        entry = tool_index.get(tool_name)
+        if entry is None:
+            return {
                 "role": "tool",
                 "tool_call_id": tool_call.id,
                 "content": f"Error: Tool '{tool_name}' not found"
-            })
-            return
+            }, None, None
         
         # Execute tool
-        server_id = tool_info["_server_id"]
-        original_name = tool_info["_original_name"]
+        server_id, original_name = entry
         connection = self.server_manager.get_connection(server_id)
         
         try:
-            logger.info(f"🔧 Executing {server_id}:{original_name} with args: {tool_args}")
+            logger.info("🔧 Executing %s:%s with args: %s", server_id, original_name, tool_args)
             result = await connection.call_tool(original_name, tool_args)
-            final_text.append(f"[Executed {server_id}:{original_name}]")
-            messages.append({
+            return {
                 "role": "tool",
                 "tool_call_id": tool_call.id,
                 "content": str(result.content)
-            })
+            }, f"[Executed {server_id}:{original_name}]", result
         except Exception as e:
             error_msg = f"Tool execution failed: {e}"
-            logger.error(f"❌ {error_msg}")
-            final_text.append(f"[Error: {error_msg}]")
-            messages.append({
+            logger.error("❌ %s", error_msg)
+            return {
                 "role": "tool",
                 "tool_call_id": tool_call.id,
                 "content": error_msg
-            })
+            }, f"[Error: {error_msg}]", None
+
+    @staticmethod
+    def _step_bits(tool_name: str, seen: int = 0) -> int:
+        """Return seen plus the workflow step bits a tool name accounts for."""
+        bits = seen
+        for step, bit in _STEP_BITS.items():
+            if not bits & bit and step in tool_name:
+                bits |= bit
+        return bits
+
+    def _formatted_answer(self, tool_call, result) -> Optional[str]:
+        """Return the text of a successful format_data call, or None."""
+        if result is None or getattr(result, "isError", False):
+            return None
+        if not self._step_bits(tool_call.function.name) & _STEP_BITS["format_data"]:
+            return None
+        
+        text = "\n".join(block.text for block in result.content if getattr(block, "text", None))
+        return text or None
 
-    def _workflow_incomplete(self, messages) -> bool:
+    def _workflow_incomplete(self, workflow_state: int) -> bool:
         """Check if workflow is incomplete (your proven logic)."""
-        recent_tools = []
-        for msg in reversed(messages[-10:]):
-            if msg.get("role") == "assistant" and msg.get("tool_calls"):
-                for tc in msg["tool_calls"]:
-                    recent_tools.append(tc["function"]["name"])
-        
-        # Check for weather workflow completion based on discovered patterns
-        has_get_secret = any("get_secret" in tool for tool in recent_tools)
-        has_build_url = any("build_api_url" in tool for tool in recent_tools) 
-        has_http_request = any("http_request" in tool for tool in recent_tools)
-        has_extract_data = any("extract_data_fields" in tool for tool in recent_tools)
-        has_format_data = any("format_data" in tool for tool in recent_tools)
-        
-        completed_steps = sum([has_get_secret, has_build_url, has_http_request, has_extract_data, has_format_data])
-        
-        if 1 <= completed_steps < 5:
-            logger.info(f"🔄 Workflow incomplete: {completed_steps}/5 steps completed")
+        completed_steps = workflow_state.bit_count()
+        
+        if 1 <= completed_steps < _WORKFLOW_STEP_COUNT:
+            logger.info(f"🔄 Workflow incomplete: {completed_steps}/{_WORKFLOW_STEP_COUNT} steps completed")
             return True
         
         return False
 
     async def _get_final_response(self, messages, final_text):
         """Get final response from OpenAI."""
+        self._trim_messages(messages)
         try:
             final_response = await self.openai_client.chat.completions.create(
                 model=self.config.openai_model,
@@ -325,6 +480,24 @@ class UniversalMCPClient:
             logger.error(f"Error getting final response: {e}")
             final_text.append(f"[Error getting final response: {e}]")
 
+    def _register_routing(self, server_id: str, profile: ServerProfile) -> None:
+        """Record a profiled server in the routing arrays.
+        
+        The arrays are replaced rather than mutated, so QueryRouter can tell
+        from their identity that its domain index is stale.
+        """
+        if server_id in self._server_ids:
+            domains = list(self._server_domains)
+            domains[self._server_ids.index(server_id)] = profile.domain
+            self._server_domains = domains
+        else:
+            self._server_ids = [*self._server_ids, server_id]
+            self._server_domains = [*self._server_domains, profile.domain]
+    
+    def get_routing_arrays(self) -> Tuple[List[str], List[str]]:
+        """Get the parallel server id and domain lists used for query routing."""
+        return self._server_ids, self._server_domains
+    
     async def get_server_profiles(self) -> Dict[str, ServerProfile]:
         """Get all server profiles."""
         return self.server_profiles.copy()
@@ -337,4 +510,17 @@ class UniversalMCPClient:
         """Shutdown all connections."""
         logger.info("Shutting down Universal MCP client...")
         await self.server_manager.shutdown()
+        # Drop all per-server state together so servers can be connected again
+        self.server_profiles.clear()
+        self._server_ids = []
+        self._server_domains = []
+        self._openai_tools.clear()
+        self._openai_tool_payloads.clear()
+        self._openai_tool_index.clear()
+        self._system_prompts.clear()
+        if self.openai_client:
+            await self.openai_client.close()
+            self.openai_client = None
+        # The next connect or query initializes a fresh OpenAI client
+        self._initialized = False
         logger.info("Universal MCP client shutdown complete")
\ No newline at end of file
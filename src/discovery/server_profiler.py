@@ -1,12 +1,84 @@
 """Server capability analysis and profiling for universal adaptation."""
-from typing import Dict, List, Set, Optional, Any
-from dataclasses import dataclass
+import functools
+import hashlib
+import logging
+import re
+import sys
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Set, Optional, Any, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 
 from src.utils.log_config import get_logger
 
 logger = get_logger(__name__)
 
+MAX_CACHED_PROFILES = 128
+
+# Name tokens: snake_case, kebab-case and camelCase parts ("HTTPRequest" -> HTTP, Request)
+_NAME_TOKEN_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z0-9]+")
+# Quoted secret names such as 'OWM-API-KEY' in a parameter description
+_SECRET_NAME_RE = re.compile(r"['\"]([A-Z][A-Z0-9_-]*(?:API|KEY)[A-Z0-9_-]*)['\"]")
+
+# Tool-name tokens per category, checked in this order
+_RETRIEVAL_TOKENS = frozenset({"get", "fetch", "retrieve", "read"})
+_STORAGE_TOKENS = frozenset({"cache", "store", "save"})
+_API_TOKENS = frozenset({"http", "api", "request", "url"})
+_PROCESSING_TOKENS = frozenset({"format", "process", "parse", "extract"})
+_AI_TOKENS = frozenset({"ai", "completion", "generate"})
+_SECURITY_TOKENS = frozenset({"secret", "key", "auth"})
+
+# (domain, keywords) checked in order against tool names and descriptions
+_DOMAIN_KEYWORDS = (
+    ("weather", ("weather", "temperature", "forecast")),
+    ("finance", ("finance", "stock", "price", "market")),
+    ("productivity", ("calendar", "task", "todo", "schedule")),
+    ("filesystem", ("file", "document", "storage")),
+)
+# One bit per capability, keyed on the tool-name fragment that signals it. AI is
+# matched as a whole name token instead, since "ai" occurs inside email, retail, ...
+_CAP_CACHE, _CAP_AI, _CAP_HTTP, _CAP_SECRET = 1, 2, 4, 8
+_CAPABILITY_BITS = (("cache", _CAP_CACHE), ("http", _CAP_HTTP), ("secret", _CAP_SECRET))
+_ALL_CAPABILITIES = _CAP_CACHE | _CAP_AI | _CAP_HTTP | _CAP_SECRET
+
+# Data source names, one bit each, and the frozenset for every combination
+_DS_OPENWEATHERMAP = sys.intern("OpenWeatherMap API")
+_DS_EXTERNAL_API = sys.intern("External API")
+_DS_OPENWEATHERMAP_BIT, _DS_EXTERNAL_API_BIT = 1, 2
+_DATA_SOURCE_SETS = (
+    frozenset(),
+    frozenset({_DS_OPENWEATHERMAP}),
+    frozenset({_DS_EXTERNAL_API}),
+    frozenset({_DS_OPENWEATHERMAP, _DS_EXTERNAL_API}),
+)
+
+# (pattern, tool names it requires), matched against the lowercased tool names
+_WORKFLOW_PATTERNS = (
+    ("authenticated_api_workflow", frozenset({"get_secret", "http_request"})),
+    ("caching_workflow", frozenset({"cache_data", "get_cached_data"})),
+    ("ai_enhanced_workflow", frozenset({"ai_completion"})),
+)
+
+_DOMAIN_BY_KEYWORD = {keyword: domain for domain, keywords in _DOMAIN_KEYWORDS for keyword in keywords}
+# Finds every domain keyword, overlapping ones included, in one scan of the text
+_DOMAIN_KEYWORD_RE = re.compile("(?=(%s))" % "|".join(map(re.escape, _DOMAIN_BY_KEYWORD)))
+
+_TOP_DOMAIN = _DOMAIN_KEYWORDS[0][0]  # Outranks every other domain once seen
+
+def _keyword_domains(text: str) -> Set[str]:
+    """Return the domains whose keywords occur in lowercase text."""
+    return {_DOMAIN_BY_KEYWORD[match.group(1)] for match in _DOMAIN_KEYWORD_RE.finditer(text)}
+
+def match_domains(text: str) -> List[str]:
+    """Return the domains whose keywords occur in lowercase text, in priority order."""
+    found = _keyword_domains(text)
+    return [domain for domain, _ in _DOMAIN_KEYWORDS if domain in found]
+
+@functools.lru_cache(maxsize=1024)
+def _name_tokens(tool_name: str) -> FrozenSet[str]:
+    """Split a tool name into its lowercase word tokens."""
+    return frozenset(token.lower() for token in _NAME_TOKEN_RE.findall(tool_name))
+
 class ToolCategory(Enum):
     """Universal tool categories for any domain."""
     DATA_RETRIEVAL = "data_retrieval"
@@ -18,176 +90,194 @@ class ToolCategory(Enum):
     UTILITIES = "utilities"
     UNKNOWN = "unknown"
 
-@dataclass
+# Category ids index this tuple
+_CATEGORIES = tuple(ToolCategory)
+# (name tokens, category id) checked in order; tools matching none are UNKNOWN
+_CATEGORY_RULES = tuple((tokens, _CATEGORIES.index(category)) for tokens, category in (
+    (_RETRIEVAL_TOKENS, ToolCategory.DATA_RETRIEVAL),
+    (_STORAGE_TOKENS, ToolCategory.STORAGE_CACHE),
+    (_API_TOKENS, ToolCategory.EXTERNAL_API),
+    (_PROCESSING_TOKENS, ToolCategory.DATA_PROCESSING),
+    (_AI_TOKENS, ToolCategory.AI_ENHANCEMENT),
+    (_SECURITY_TOKENS, ToolCategory.SECURITY),
+))
+_UNKNOWN_CATEGORY_ID = _CATEGORIES.index(ToolCategory.UNKNOWN)
+
+@dataclass(slots=True, frozen=True)
 class ServerProfile:
     """Complete server capability profile built through introspection."""
     server_id: str
     domain: Optional[str]  # weather, finance, productivity, etc.
     tools: List[str]  # Tool names
-    tool_categories: Dict[ToolCategory, List[str]]
+    tool_categories: Dict[ToolCategory, List[str]]  # Non-empty categories only
     workflow_patterns: List[str]  # Detected workflow patterns
-    data_sources: Set[str]  # External APIs/services this server uses
+    data_sources: FrozenSet[str]  # External APIs/services this server uses
     capabilities: Dict[str, any]  # Detailed analysis
-    server_configuration: Dict[str, Any] = None
+    server_configuration: Dict[str, Any] = field(default_factory=dict)
 
 class ServerProfiler:
     """Analyzes any MCP server to build dynamic capability profiles."""
     
-    async def profile_server(self, connection) -> ServerProfile:
+    def __init__(self):
+        # Tool signature digest -> _scan_tools result, least recently used first.
+        # Scan results are shared between profiles and treated as read-only.
+        self._scan_cache: Dict[bytes, Dict[str, Any]] = {}
+    
+    def profile_server(self, connection) -> ServerProfile:
         """Build comprehensive server profile through introspection."""
-        logger.info(f"Profiling server: {connection.server_id}")
-        
-        # Basic tool analysis
-        tool_names = [tool.name for tool in connection.tools]
-        tool_categories = await self._categorize_tools(connection.tools)
-        
-        # Domain detection based on tool patterns
-        domain = await self._detect_domain(connection.tools)
+        logger.info("Profiling server: %s", connection.server_id)
         
-        # Workflow pattern analysis
-        patterns = await self._analyze_workflow_patterns(connection.tools)
-        
-        # Data source identification
-        data_sources = await self._identify_data_sources(connection.tools)
+        # Every aggregate comes from one pass over the normalized tools; servers
+        # exposing the same tools (reconnects, duplicate servers) reuse the earlier scan
+        normalized = self._normalize_tools(connection.tools)
+        signature = self._tool_signature(normalized)
+        scan = self._scan_cache.pop(signature, None)
+        if scan is None:
+            scan = self._scan_tools(normalized)
+            if len(self._scan_cache) >= MAX_CACHED_PROFILES:
+                del self._scan_cache[next(iter(self._scan_cache))]
+        self._scan_cache[signature] = scan
         
         profile = ServerProfile(
             server_id=connection.server_id,
-            domain=domain,
-            tools=tool_names,
-            tool_categories=tool_categories,
-            workflow_patterns=patterns,
-            data_sources=data_sources,
-            capabilities=await self._analyze_capabilities(connection.tools)
+            domain=scan["domain"],
+            tools=scan["tool_names"],
+            tool_categories=scan["tool_categories"],
+            workflow_patterns=scan["workflow_patterns"],
+            data_sources=scan["data_sources"],
+            capabilities=scan["capabilities"]
         )
         
-        logger.info(f"Server '{connection.server_id}' profiled: {domain} domain, {len(tool_names)} tools")
+        logger.info("Server '%s' profiled: %s domain, %d tools", connection.server_id, profile.domain, len(profile.tools))
         return profile
     
-    async def _categorize_tools(self, tools) -> Dict[ToolCategory, List[str]]:
-        """Categorize tools into universal categories."""
-        categories = {category: [] for category in ToolCategory}
+    @staticmethod
+    def _normalize_tools(tools) -> List[Tuple[str, str, str, FrozenSet[str]]]:
+        """Compute (interned name, lowercase name, lowercase description, name tokens) once per tool."""
+        return [
+            (sys.intern(tool.name), tool.name.lower(), (tool.description or "").lower(), _name_tokens(tool.name))
+            for tool in tools
+        ]
+    
+    @staticmethod
+    def _tool_signature(normalized) -> bytes:
+        """Digest of the tool names and descriptions, in listing order."""
+        return hashlib.blake2b(
+            b"\0".join(f"{name}\x01{description}".encode() for name, _, description, _ in normalized),
+            digest_size=16
+        ).digest()
+    
+    def _scan_tools(self, normalized) -> Dict[str, Any]:
+        """Compute categories, domain, workflow patterns, data sources and capabilities in one pass."""
+        tool_names = []
+        category_lists = defaultdict(list)  # Only categories that occur get a list
+        lowered_names = set()
+        domains = set()
+        data_source_bits = 0
+        capability_bits = 0
         
-        for tool in tools:
-            category = await self._classify_tool(tool)
-            categories[category].append(tool.name)
+        for name, name_lc, description, tokens in normalized:
+            category_id = self._classify_tool(tokens)
+            tool_names.append(name)
+            category_lists[category_id].append(name)
+            lowered_names.add(name_lc)
+            # No later tool can change the domain once the top-priority one is seen
+            if _TOP_DOMAIN not in domains:
+                domains |= _keyword_domains(name_lc)
+                if description:
+                    domains |= _keyword_domains(description)
+            
+            # Look for API mentions
+            if "openweathermap" in description or "owm" in description:
+                data_source_bits |= _DS_OPENWEATHERMAP_BIT
+            elif "api" in description and "http" in name_lc:
+                data_source_bits |= _DS_EXTERNAL_API_BIT
+            
+            if capability_bits != _ALL_CAPABILITIES:
+                for fragment, bit in _CAPABILITY_BITS:
+                    if fragment in name_lc:
+                        capability_bits |= bit
+                if "ai" in tokens:
+                    capability_bits |= _CAP_AI
         
-        return categories
+        return {
+            "tool_names": tool_names,
+            "tool_categories": {_CATEGORIES[i]: category_lists[i] for i in sorted(category_lists)},
+            "domain": self._detect_domain(domains),
+            "workflow_patterns": self._analyze_workflow_patterns(lowered_names),
+            "data_sources": _DATA_SOURCE_SETS[data_source_bits],
+            "capabilities": {
+                "tool_count": len(tool_names),
+                "has_caching": bool(capability_bits & _CAP_CACHE),
+                "has_ai_features": bool(capability_bits & _CAP_AI),
+                "has_external_apis": bool(capability_bits & _CAP_HTTP),
+                "has_security": bool(capability_bits & _CAP_SECRET)
+            }
+        }
     
-    async def _classify_tool(self, tool) -> ToolCategory:
-        """Classify a single tool into a category."""
-        tool_name = tool.name.lower()
-        description = tool.description.lower() if tool.description else ""
-        
-        # Pattern matching for universal classification
-        if any(keyword in tool_name for keyword in ["get", "fetch", "retrieve", "read"]):
-            return ToolCategory.DATA_RETRIEVAL
-        elif any(keyword in tool_name for keyword in ["cache", "store", "save"]):
-            return ToolCategory.STORAGE_CACHE
-        elif any(keyword in tool_name for keyword in ["http", "api", "request", "url"]):
-            return ToolCategory.EXTERNAL_API
-        elif any(keyword in tool_name for keyword in ["format", "process", "parse", "extract"]):
-            return ToolCategory.DATA_PROCESSING
-        elif any(keyword in tool_name for keyword in ["ai", "completion", "generate"]):
-            return ToolCategory.AI_ENHANCEMENT
-        elif any(keyword in tool_name for keyword in ["secret", "key", "auth"]):
-            return ToolCategory.SECURITY
-        else:
-            return ToolCategory.UNKNOWN
+    def _classify_tool(self, tokens: FrozenSet[str]) -> int:
+        """Classify a single tool by its name tokens, returning its category id."""
+        # Token matching for universal classification
+        for category_tokens, category_id in _CATEGORY_RULES:
+            if tokens & category_tokens:
+                return category_id
+        return _UNKNOWN_CATEGORY_ID
     
-    async def _analyze_tool_schemas(self, tools) -> Dict[str, Any]:
+    def _analyze_tool_schemas(self, tools) -> Dict[str, Any]:
         """Analyze tool schemas for configuration hints."""
         config = {"secret_names": [], "expected_parameters": {}}
+        debug = logger.isEnabledFor(logging.DEBUG)
+        descriptions = []  # Parameter descriptions to search for secret names
         
         for tool in tools:
             if "secret" in tool.name.lower() and hasattr(tool, 'inputSchema'):
                 schema = tool.inputSchema
                 
-                # Debug: Let's see what's actually in the schema
-                print(f"🔍 Analyzing schema for {tool.name}: {schema}")
+                if debug:
+                    logger.debug("🔍 Analyzing schema for %s: %s", tool.name, schema)
                 
                 if isinstance(schema, dict) and 'properties' in schema:
                     secret_prop = schema['properties'].get('secret_name', {})
                     
                     # Extract examples, enums, or hints from description
                     if 'examples' in secret_prop:
-                        print(f"✅ Found examples in schema: {secret_prop['examples']}")
+                        if debug:
+                            logger.debug("✅ Found examples in schema: %s", secret_prop['examples'])
                         config["secret_names"].extend(secret_prop['examples'])
                     
                     elif 'enum' in secret_prop:
-                        print(f"✅ Found enum in schema: {secret_prop['enum']}")
+                        if debug:
+                            logger.debug("✅ Found enum in schema: %s", secret_prop['enum'])
                         config["secret_names"].extend(secret_prop['enum'])
                     
                     elif 'description' in secret_prop:
                         # Parse description for patterns like "OWM-API-KEY"
                         desc = secret_prop['description']
-                        print(f"🔍 Parsing description: {desc}")
-                        
-                        import re
-                        # Look for quoted strings that look like secret names
-                        patterns = re.findall(r"['\"]([A-Z][A-Z0-9_-]*(?:API|KEY)[A-Z0-9_-]*)['\"]", desc)
-                        if patterns:
-                            print(f"✅ Extracted secret patterns: {patterns}")
-                            config["secret_names"].extend(patterns)
+                        if debug:
+                            logger.debug("🔍 Parsing description: %s", desc)
+                        descriptions.append(desc)
         
-        print(f"🔍 Discovered secret names: {config['secret_names']}")
+        # Look for quoted strings that look like secret names, scanning every
+        # description in one pass; names cannot contain NUL, so no match spans two
+        if descriptions:
+            patterns = _SECRET_NAME_RE.findall("\0".join(descriptions))
+            if patterns:
+                if debug:
+                    logger.debug("✅ Extracted secret patterns: %s", patterns)
+                config["secret_names"].extend(patterns)
+        
+        if debug:
+            logger.debug("🔍 Discovered secret names: %s", config['secret_names'])
         return config
 
-    async def _detect_domain(self, tools) -> Optional[str]:
-        """Detect server domain based on tool patterns."""
-        tool_names = " ".join([tool.name.lower() for tool in tools])
-        tool_descriptions = " ".join([tool.description.lower() for tool in tools if tool.description])
-        combined_text = f"{tool_names} {tool_descriptions}"
-        
-        # Domain detection patterns
-        if any(keyword in combined_text for keyword in ["weather", "temperature", "forecast"]):
-            return "weather"
-        elif any(keyword in combined_text for keyword in ["finance", "stock", "price", "market"]):
-            return "finance"
-        elif any(keyword in combined_text for keyword in ["calendar", "task", "todo", "schedule"]):
-            return "productivity"
-        elif any(keyword in combined_text for keyword in ["file", "document", "storage"]):
-            return "filesystem"
-        else:
-            return "general"
+    def _detect_domain(self, domains: Set[str]) -> Optional[str]:
+        """Pick the highest-priority domain whose keywords the tools mention."""
+        for domain, _ in _DOMAIN_KEYWORDS:
+            if domain in domains:
+                return domain
+        return "general"
     
-    async def _analyze_workflow_patterns(self, tools) -> List[str]:
-        """Analyze common workflow patterns based on tool combinations."""
-        patterns = []
-        tool_names = [tool.name.lower() for tool in tools]
-        
+    def _analyze_workflow_patterns(self, tool_names: Set[str]) -> List[str]:
+        """Analyze common workflow patterns based on lowercased tool names."""
         # Common workflow patterns
-        if "get_secret" in tool_names and "http_request" in tool_names:
-            patterns.append("authenticated_api_workflow")
-        
-        if "cache_data" in tool_names and "get_cached_data" in tool_names:
-            patterns.append("caching_workflow")
-        
-        if "ai_completion" in tool_names:
-            patterns.append("ai_enhanced_workflow")
-        
-        return patterns
-    
-    async def _identify_data_sources(self, tools) -> Set[str]:
-        """Identify external data sources this server connects to."""
-        data_sources = set()
-        
-        for tool in tools:
-            description = tool.description.lower() if tool.description else ""
-            
-            # Look for API mentions
-            if "openweathermap" in description or "owm" in description:
-                data_sources.add("OpenWeatherMap API")
-            elif "api" in description and "http" in tool.name.lower():
-                data_sources.add("External API")
-        
-        return data_sources
-    
-    async def _analyze_capabilities(self, tools) -> Dict[str, any]:
-        """Detailed capability analysis."""
-        return {
-            "tool_count": len(tools),
-            "has_caching": any("cache" in tool.name.lower() for tool in tools),
-            "has_ai_features": any("ai" in tool.name.lower() for tool in tools),
-            "has_external_apis": any("http" in tool.name.lower() for tool in tools),
-            "has_security": any("secret" in tool.name.lower() for tool in tools)
-        }
\ No newline at end of file
+        return [pattern for pattern, required in _WORKFLOW_PATTERNS if required <= tool_names]
\ No newline at end of file
@@ -1,6 +1,6 @@
 """Query routing for universal MCP client."""
-from typing import Dict, Any
-from src.discovery.server_profiler import ServerProfile
+from typing import Dict, Any, Optional, Sequence
+from src.discovery.server_profiler import match_domains
 from src.utils.log_config import get_logger
 
 logger = get_logger(__name__)
@@ -8,21 +8,39 @@ logger = get_logger(__name__)
 class QueryRouter:
     """Routes queries to optimal servers based on capability analysis."""
     
-    async def route_query(self, query: str, profiles: Dict[str, ServerProfile]) -> Dict[str, Any]:
-        """Route query to best server(s) based on intent analysis."""
-        logger.info(f"Routing query: {query}")
+    def __init__(self):
+        # domain -> server ids, rebuilt whenever a new server_domains array is passed in
+        self._domain_index: Dict[str, list] = {}
+        self._indexed_domains: Optional[Sequence[str]] = None
+    
+    def route_query(self, query: str, server_ids: Sequence[str],
+                    server_domains: Sequence[str]) -> Dict[str, Any]:
+        """Route query to best server(s) based on intent analysis.
+        
+        server_ids and server_domains are parallel: server_domains[i] is the
+        profiled domain of server_ids[i].
+        """
+        logger.info("Routing query: %s", query)
         
-        # Simple routing logic for now - we'll enhance this
-        query_lower = query.lower()
+        if server_domains is not self._indexed_domains:
+            self._build_domain_index(server_ids, server_domains)
         
-        # Weather queries
-        if any(keyword in query_lower for keyword in ["weather", "temperature", "forecast"]):
-            weather_servers = [sid for sid, profile in profiles.items() if profile.domain == "weather"]
-            if weather_servers:
-                return {"primary_server": weather_servers[0], "query_type": "weather"}
+        # Route to a server in the first domain the query mentions that one covers
+        for domain in match_domains(query.lower()):
+            domain_servers = self._domain_index.get(domain)
+            if domain_servers:
+                return {"primary_server": domain_servers[0], "query_type": domain}
         
         # Default to first available server
-        if profiles:
-            return {"primary_server": list(profiles.keys())[0], "query_type": "general"}
+        if server_ids:
+            return {"primary_server": server_ids[0], "query_type": "general"}
         
-        raise ValueError("No suitable servers found for query")
\ No newline at end of file
+        raise ValueError("No suitable servers found for query")
+    
+    def _build_domain_index(self, server_ids: Sequence[str], server_domains: Sequence[str]) -> None:
+        """Index server ids by domain, keeping connect order within each domain."""
+        domain_index = {}
+        for server_id, domain in zip(server_ids, server_domains):
+            domain_index.setdefault(domain, []).append(server_id)
+        self._domain_index = domain_index
+        self._indexed_domains = server_domains
@@ -8,10 +8,10 @@ logger = get_logger(__name__)
 class WorkflowPlanner:
     """Plans optimal workflows across multiple servers."""
     
-    async def plan_workflow(self, query: str, routing_plan: Dict[str, Any], 
-                          profiles: Dict[str, ServerProfile]) -> Dict[str, Any]:
+    def plan_workflow(self, query: str, routing_plan: Dict[str, Any], 
+                      profiles: Dict[str, ServerProfile]) -> Dict[str, Any]:
         """Plan optimal workflow based on query and server capabilities."""
-        logger.info(f"Planning workflow for: {query}")
+        logger.info("Planning workflow for: %s", query)
         
         # For now, pass through the routing plan
         # We'll build sophisticated planning in the next phase
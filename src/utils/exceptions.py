@@ -8,6 +8,10 @@ class MCPConnectionError(UniversalMCPError):
     """Raised when connection to MCP server fails."""
     pass
 
+class ServerValidationError(UniversalMCPError):
+    """Raised when a server script cannot be launched."""
+    pass
+
 class ServerDiscoveryError(UniversalMCPError):
     """Raised when server discovery/profiling fails."""
     pass
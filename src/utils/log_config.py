@@ -3,24 +3,26 @@ import logging
 import sys
 from typing import Optional
 
+# One handler and formatter for the whole application, attached to the package
+# logger; module loggers propagate up to it
+_HANDLER = logging.StreamHandler(sys.stdout)
+_HANDLER.setFormatter(logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+))
+_ROOT = logging.getLogger("src")
+_ROOT.addHandler(_HANDLER)
+_ROOT.setLevel(logging.INFO)
+
 def get_logger(name: str, level: Optional[str] = None) -> logging.Logger:
-    """Get a configured logger instance."""
+    """Get a logger that writes through the shared application handler."""
     logger = logging.getLogger(name)
     
-    if not logger.handlers:
-        # Create console handler
-        handler = logging.StreamHandler(sys.stdout)
-        
-        # Create formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        
-        # Add handler to logger
-        logger.addHandler(handler)
-        
-        # Set level
-        logger.setLevel(getattr(logging, (level or "INFO").upper()))
+    # Loggers outside the package (e.g. __main__) don't propagate to _ROOT
+    if name != _ROOT.name and not name.startswith(_ROOT.name + ".") and _HANDLER not in logger.handlers:
+        logger.addHandler(_HANDLER)
+        logger.setLevel(logging.INFO)
+    
+    if level:
+        logger.setLevel(level.upper())
     
     return logger
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""Tests for UniversalMCPClient's streamed completions, message trimming and shutdown."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.config.settings import UniversalMCPConfig
+from src.core.universal_client import UniversalMCPClient, _TRUNCATED_TOOL_RESULT
+from src.utils.exceptions import UniversalMCPError
+
+
+def _chunk(content=None, tool_calls=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=tool_calls))])
+
+
+def _tool_delta(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+class FakeCompletions:
+    """Stands in for chat.completions, streaming the given chunks."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return self._stream()
+
+    async def _stream(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(0)
+            yield chunk
+        if self.error is not None:
+            await asyncio.sleep(0)
+            raise self.error
+
+
+@pytest.fixture
+def client():
+    client = UniversalMCPClient(UniversalMCPConfig(azure_key_vault_name="test-vault"))
+    client.executed = []
+
+    async def execute_single_tool(tool_call, tool_index):
+        client.executed.append(tool_call.id)
+        return {"role": "tool", "tool_call_id": tool_call.id, "content": tool_call.function.arguments}, None, None
+
+    client._execute_single_tool = execute_single_tool
+    return client
+
+
+def _use_stream(client, chunks, error=None):
+    completions = FakeCompletions(chunks, error)
+    client.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return completions
+
+
+async def test_stream_completion_assembles_split_tool_calls(client):
+    completions = _use_stream(client, [
+        _chunk(content="Checking "),
+        _chunk(content="both."),
+        _chunk(tool_calls=[_tool_delta(0, id="call_a", name="get_")]),
+        _chunk(tool_calls=[_tool_delta(0, name="weather", arguments='{"city":')]),
+        _chunk(tool_calls=[_tool_delta(0, arguments=' "Oslo"}')]),
+        _chunk(tool_calls=[_tool_delta(1, id="call_b", name="get_forecast", arguments="{}")]),
+        SimpleNamespace(choices=[]),
+    ])
+
+    content, tool_calls, pending = await client._stream_completion([], {}, [{"type": "function"}])
+    results = await asyncio.gather(*pending)
+
+    assert content == "Checking both."
+    assert [(call.id, call.function.name, call.function.arguments) for call in tool_calls] == [
+        ("call_a", "get_weather", '{"city": "Oslo"}'),
+        ("call_b", "get_forecast", "{}"),
+    ]
+    assert client.executed == ["call_a", "call_b"]
+    assert [tool_msg["tool_call_id"] for tool_msg, _, _ in results] == ["call_a", "call_b"]
+    assert completions.requests[0]["stream"] is True
+
+
+async def test_stream_completion_without_tool_calls(client):
+    _use_stream(client, [_chunk(content="Hello")])
+
+    content, tool_calls, pending = await client._stream_completion([], {}, [])
+
+    assert content == "Hello"
+    assert tool_calls == []
+    assert pending == []
+
+
+async def test_stream_completion_cancels_started_tools_when_stream_fails(client):
+    started = []
+
+    async def execute_single_tool(tool_call, tool_index):
+        started.append(asyncio.current_task())
+        await asyncio.Event().wait()
+
+    client._execute_single_tool = execute_single_tool
+    _use_stream(client, [
+        _chunk(tool_calls=[_tool_delta(0, id="call_a", name="first", arguments="{}")]),
+        _chunk(tool_calls=[_tool_delta(1, id="call_b", name="second")]),
+    ], error=RuntimeError("stream dropped"))
+
+    with pytest.raises(RuntimeError, match="stream dropped"):
+        await client._stream_completion([], {}, [])
+
+    # Only the first call was complete when the stream failed
+    assert len(started) == 1
+    await asyncio.sleep(0)
+    assert started[0].cancelled()
+
+
+def _conversation(rounds, calls_per_round=2):
+    messages = [{"role": "system", "content": "system"}, {"role": "user", "content": "query"}]
+    for r in range(rounds):
+        ids = [f"call_{r}_{c}" for c in range(calls_per_round)]
+        messages.append({"role": "assistant", "content": None, "tool_calls": [{"id": i} for i in ids]})
+        messages.extend({"role": "tool", "tool_call_id": i, "content": f"result {i}"} for i in ids)
+    return messages
+
+
+def _stubbed_ids(messages):
+    return [m["tool_call_id"] for m in messages if m["role"] == "tool" and m["content"] == _TRUNCATED_TOOL_RESULT]
+
+
+def test_trim_messages_keeps_recent_rounds():
+    messages = _conversation(3)
+    original = [dict(m) for m in messages]
+
+    UniversalMCPClient._trim_messages(messages)
+
+    assert messages == original
+
+
+def test_trim_messages_stubs_only_rounds_older_than_three():
+    messages = _conversation(5)
+    tool_call_ids = [m["tool_call_id"] for m in messages if m["role"] == "tool"]
+
+    UniversalMCPClient._trim_messages(messages)
+
+    assert _stubbed_ids(messages) == ["call_0_0", "call_0_1", "call_1_0", "call_1_1"]
+    assert [m["tool_call_id"] for m in messages if m["role"] == "tool"] == tool_call_ids
+    assert [m["role"] for m in messages] == [m["role"] for m in _conversation(5)]
+    assert messages[0]["content"] == "system" and messages[1]["content"] == "query"
+
+
+def test_trim_messages_is_incremental_across_calls():
+    messages = _conversation(4)
+    UniversalMCPClient._trim_messages(messages)
+    assert _stubbed_ids(messages) == ["call_0_0", "call_0_1"]
+
+    messages.extend(_conversation(5)[len(messages):])
+    UniversalMCPClient._trim_messages(messages)
+
+    assert _stubbed_ids(messages) == ["call_0_0", "call_0_1", "call_1_0", "call_1_1"]
+
+
+class FakeServerManager:
+    """Stands in for ServerManager, handing out connections with fixed tools."""
+
+    def __init__(self, tools):
+        self.tools = tools
+        self.connections = {}
+
+    async def connect_to_server(self, server_id, server_path):
+        self.connections[server_id] = SimpleNamespace(server_id=server_id, tools=self.tools)
+
+    def get_connection(self, server_id):
+        return self.connections[server_id]
+
+    async def shutdown(self):
+        self.connections.clear()
+
+
+async def test_reconnect_after_shutdown(client):
+    tools = [
+        SimpleNamespace(name="get_weather", description="Get weather for a city", inputSchema={"type": "object"}),
+        SimpleNamespace(name="format_weather", description="Format weather data", inputSchema={"type": "object"}),
+    ]
+    client.server_manager = FakeServerManager(tools)
+
+    async def initialize():
+        client._initialized = True
+
+    client.initialize = initialize
+
+    await client.connect_to_server("weather", "weather_server.py")
+    domain = client.server_profiles["weather"].domain
+    await client.shutdown()
+
+    assert client.server_profiles == {}
+    assert client.get_routing_arrays() == ([], [])
+    assert client._openai_tools == client._openai_tool_payloads == client._openai_tool_index == {}
+    assert client._system_prompts == {}
+    with pytest.raises(UniversalMCPError, match="No servers connected"):
+        await client.process_universal_query("weather in Oslo?")
+
+    await client.connect_to_server("weather", "weather_server.py")
+
+    assert client.get_routing_arrays() == (["weather"], [domain])
+    assert list(client._openai_tool_index["weather"]) == ["weather_get_weather", "weather_format_weather"]
+    assert "weather" in client._system_prompts